@@ -91,6 +91,9 @@ class ConfigurationManager:
                 "security",
                 "custom",
             ],
+            "gui": {
+                "launch_on_startup": True,
+            },
             "path_resolution": {
                 "enforce_project_root_relative": True,
                 "normalize_absolute_paths": True,
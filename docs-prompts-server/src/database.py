@@ -13,6 +13,14 @@ from models import DocumentInfo
 
 logger = logging.getLogger(__name__)
 
+# Per-connection settings. NORMAL sync is durable under WAL except for the
+# last transactions on power loss, acceptable for a rebuildable index.
+_CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+)
+
 
 class DatabaseManager:
     """Manages all database operations"""
@@ -21,10 +29,27 @@ class DatabaseManager:
         self.db_path = db_path
         self._init_database()
 
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection tuned for the read-mostly workload"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            for pragma in _CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+        except sqlite3.Error as e:
+            logger.debug(f"Could not apply connection pragmas: {e}")
+        return conn
+
     def _init_database(self):
         """Initialize SQLite database with required tables"""
         logger.info(f"Initializing database at {self.db_path}")
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
+            # WAL is persistent in the database file; it lets readers run
+            # alongside the single writer (indexer or prompt updates).
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+            except sqlite3.Error as e:
+                logger.warning(f"Could not enable WAL journal mode: {e}")
+
             # Documents tables
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS documents
@@ -85,6 +110,14 @@ class DatabaseManager:
                 )
             """)
 
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS meta
+                (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            """)
+
             # Create indexes
             conn.execute(
                 "CREATE INDEX IF NOT EXISTS idx_search_content ON search_index(content_chunk)"
@@ -100,7 +133,7 @@ class DatabaseManager:
     # Document operations
     def store_document(self, doc_info: DocumentInfo):
         """Store a document in the database"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             conn.execute(
                 """
                 INSERT OR REPLACE INTO documents
@@ -153,7 +186,7 @@ class DatabaseManager:
 
     def get_document_hash(self, path: str) -> Optional[str]:
         """Get the stored hash for a document"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.execute(
                 "SELECT file_hash FROM documents WHERE path = ?", (path,)
             )
@@ -164,7 +197,7 @@ class DatabaseManager:
         self, query: str, doc_type: Optional[str] = None, limit: int = 10
     ) -> List[Dict[str, Any]]:
         """Search documents using text matching"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             sql = """
                 SELECT DISTINCT d.path, d.title, d.doc_type, d.metadata,
                                 s.section_title, s.content_chunk, s.chunk_type
@@ -203,22 +236,37 @@ class DatabaseManager:
 
     def get_document_count(self) -> int:
         """Get total number of indexed documents"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.execute("SELECT COUNT(*) FROM documents")
             return cursor.fetchone()[0]
 
     def clear_documents(self):
         """Clear all documents and search index"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             conn.execute("DELETE FROM documents")
             conn.execute("DELETE FROM search_index")
 
+    # Metadata operations
+    def get_meta(self, key: str) -> Optional[str]:
+        """Get a stored metadata value"""
+        with self._connect() as conn:
+            cursor = conn.execute("SELECT value FROM meta WHERE key = ?", (key,))
+            result = cursor.fetchone()
+            return result[0] if result else None
+
+    def set_meta(self, key: str, value: str):
+        """Store a metadata value"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+            )
+
     # Prompt operations
     def store_prompt(self, prompt_data: Dict[str, Any]):
         """Store a prompt in the database"""
         current_time = time.time()
 
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             conn.execute(
                 """
                 INSERT OR REPLACE INTO prompts
@@ -240,7 +288,7 @@ class DatabaseManager:
 
     def get_prompt(self, prompt_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific prompt by ID"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.execute(
                 """
                 SELECT id, name, description, category, template, variables, tags,
@@ -252,26 +300,50 @@ class DatabaseManager:
 
             result = cursor.fetchone()
             if result:
-                return {
-                    "id": result[0],
-                    "name": result[1],
-                    "description": result[2],
-                    "category": result[3],
-                    "template": result[4],
-                    "variables": json.loads(result[5]),
-                    "tags": json.loads(result[6]),
-                    "created_at": result[7],
-                    "updated_at": result[8],
-                    "usage_count": result[9],
-                    "effectiveness_score": result[10],
-                }
+                return self._prompt_from_row(result)
             return None
 
+    def get_prompts(self, prompt_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get several prompts by ID in one query, in the order requested"""
+        if not prompt_ids:
+            return []
+
+        with self._connect() as conn:
+            placeholders = ",".join("?" * len(prompt_ids))
+            cursor = conn.execute(
+                f"""
+                SELECT id, name, description, category, template, variables, tags,
+                       created_at, updated_at, usage_count, effectiveness_score
+                FROM prompts WHERE id IN ({placeholders})
+            """,
+                list(prompt_ids),
+            )
+
+            found = {row[0]: self._prompt_from_row(row) for row in cursor.fetchall()}
+            return [found[pid] for pid in prompt_ids if pid in found]
+
+    @staticmethod
+    def _prompt_from_row(row) -> Dict[str, Any]:
+        """Build a full prompt dict from a prompts table row"""
+        return {
+            "id": row[0],
+            "name": row[1],
+            "description": row[2],
+            "category": row[3],
+            "template": row[4],
+            "variables": json.loads(row[5]),
+            "tags": json.loads(row[6]),
+            "created_at": row[7],
+            "updated_at": row[8],
+            "usage_count": row[9],
+            "effectiveness_score": row[10],
+        }
+
     def search_prompts(
         self, query: str, category: Optional[str] = None, limit: int = 10
     ) -> List[Dict[str, Any]]:
         """Search prompts by keyword or category"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             sql = """
                 SELECT id, name, description, category, tags, usage_count, effectiveness_score
                 FROM prompts
@@ -308,7 +380,7 @@ class DatabaseManager:
         self, category: str, limit: int = 10
     ) -> List[Dict[str, Any]]:
         """Get prompts by category"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.execute(
                 """
                 SELECT id, name, description, tags, usage_count, effectiveness_score
@@ -336,7 +408,7 @@ class DatabaseManager:
 
     def get_all_prompts(self) -> List[Dict[str, Any]]:
         """Get all prompts"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.execute("""
                 SELECT id, name, description, category, tags, usage_count, effectiveness_score
                 FROM prompts ORDER BY category, name
@@ -360,7 +432,7 @@ class DatabaseManager:
 
     def get_popular_prompts(self, limit: int = 5) -> List[Dict[str, Any]]:
         """Get popular prompts by usage"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.execute(
                 """
                 SELECT id, name, description, category, usage_count, effectiveness_score
@@ -388,7 +460,7 @@ class DatabaseManager:
         self, prompt_id: str, context: str = "", effectiveness: int = 5
     ):
         """Record prompt usage for analytics"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             # Record usage
             conn.execute(
                 """
@@ -411,7 +483,7 @@ class DatabaseManager:
 
     def get_usage_stats(self) -> List[Dict[str, Any]]:
         """Get usage statistics for all prompts"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.execute("""
                 SELECT p.id, p.name, p.category, p.usage_count, p.effectiveness_score,
                        COUNT(pu.id) as total_uses,
@@ -439,7 +511,7 @@ class DatabaseManager:
 
     def get_all_documents(self) -> List[Dict[str, Any]]:
         """Get all indexed documents"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.execute("""
                 SELECT path, title, doc_type, metadata, last_modified,
                        file_hash
@@ -3,6 +3,7 @@ Document indexing coordination for the Documentation and Prompts MCP Server
 """
 
 import asyncio
+import hashlib
 import logging
 from pathlib import Path
 from typing import Dict, Any, List, Optional
@@ -139,18 +140,24 @@ class DocumentIndexer:
     def _index_single_document(
         self, file_path: Path
     ) -> Optional[DocumentInfo]:
-        """Index a single document (synchronous wrapper)"""
+        """Index a single document (synchronous wrapper).
+
+        The file is read once; the same bytes feed the change check and
+        document processing.
+        """
         try:
+            if not self.processor.should_index_file(file_path):
+                return None
+
+            raw = file_path.read_bytes()
+
             # Check if already indexed and unchanged
             stored_hash = self.db_manager.get_document_hash(str(file_path))
-            if stored_hash:
-                # Quick check without reading file
-                current_hash = self._calculate_file_hash(file_path)
-                if current_hash == stored_hash:
-                    return None  # Already up to date
+            if stored_hash and hashlib.md5(raw).hexdigest() == stored_hash:
+                return None  # Already up to date
 
             # Process the document
-            doc_info = self.processor.process_document(file_path)
+            doc_info = self.processor.process_document(file_path, raw)
             if doc_info:
                 self.db_manager.store_document(doc_info)
                 logger.info(f"Indexed document: {file_path}")
@@ -162,16 +169,6 @@ class DocumentIndexer:
             logger.error(f"Error indexing document {file_path}: {e}")
             return None
 
-    def _calculate_file_hash(self, file_path: Path) -> Optional[str]:
-        """Calculate MD5 hash of file content"""
-        try:
-            import hashlib
-
-            with open(file_path, "rb") as f:
-                return hashlib.md5(f.read()).hexdigest()
-        except Exception:
-            return None
-
     def search_documents(
         self, query: str, doc_type: Optional[str] = None, limit: int = 10
     ) -> List[Dict[str, Any]]:
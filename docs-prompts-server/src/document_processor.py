@@ -75,18 +75,27 @@ class DocumentProcessor:
             logger.debug(f"Skipping {file_path}: access error - {e}")
             return False
 
-    def process_document(self, file_path: Path) -> Optional[DocumentInfo]:
-        """Process a single document and extract metadata"""
+    def process_document(
+        self, file_path: Path, raw: Optional[bytes] = None
+    ) -> Optional[DocumentInfo]:
+        """Process a single document and extract metadata.
+
+        ``raw`` may carry the file bytes already read (and validated with
+        ``should_index_file``) by the caller, so the file is read only once.
+        """
         try:
             logger.debug(f"Processing document: {file_path}")
 
-            if not self.should_index_file(file_path):
-                return None
-
-            with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                content = f.read()
+            if raw is None:
+                if not self.should_index_file(file_path):
+                    return None
+                raw = file_path.read_bytes()
 
-            file_hash = hashlib.md5(content.encode()).hexdigest()
+            content = raw.decode("utf-8", errors="ignore")
+            if "\r" in content:
+                # Match text-mode open(): universal newlines
+                content = content.replace("\r\n", "\n").replace("\r", "\n")
+            file_hash = hashlib.md5(raw).hexdigest()
             last_modified = file_path.stat().st_mtime
 
             # Extract metadata based on file type
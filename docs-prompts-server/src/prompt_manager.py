@@ -2,29 +2,128 @@
 Prompt management for the Documentation and Prompts MCP Server
 """
 
+import copy
+import hashlib
+import itertools
 import logging
+import re
+import string
+import textwrap
+import time
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, List, Optional, Tuple
 
 from database import DatabaseManager
 
 logger = logging.getLogger(__name__)
 
+# Read-path caching: prompt rows change rarely, so lookups are served from
+# memory and invalidated whenever this manager writes to the prompts table.
+# Callers get copies, so mutating a result never alters the cache.
+_PROMPT_CACHE_SIZE = 256
+_QUERY_CACHE_SIZE = 128
+_QUERY_CACHE_TTL = 60.0
+
+# Default prompt definitions and the meta key recording which version is loaded
+_DEFAULT_PROMPTS_FILE = (
+    Path(__file__).parent.parent / "prompts" / "default_prompts.yaml"
+)
+_DEFAULTS_HASH_KEY = "defaults_hash"
+
+# Context keywords mapped to prompt categories. Keywords match as substrings
+# ("testing" hits "test"), so they are combined into one regex alternation.
+_KEYWORD_CATEGORIES = {
+    "review": ("code-quality",),
+    "test": ("testing",),
+    "api": ("api", "documentation"),
+    "security": ("security",),
+    "refactor": ("refactoring",),
+    "architecture": ("architecture",),
+    "document": ("documentation",),
+}
+_KEYWORD_PATTERN = re.compile("|".join(map(re.escape, _KEYWORD_CATEGORIES)))
+
+# Custom prompt IDs: millisecond start time, incremented per prompt
+_ID_COUNTER = itertools.count(int(time.time() * 1000))
+
+
+@lru_cache(maxsize=_PROMPT_CACHE_SIZE)
+def _compile_template(
+    template: str,
+) -> Tuple[Tuple[str, Optional[str], str, Optional[str]], ...]:
+    """Parse a format-style template once into (literal, field, spec, conversion)"""
+    return tuple(string.Formatter().parse(template))
+
+
+def _format_value(value: Any, spec: str, conversion: Optional[str]) -> str:
+    """Apply a replacement field's conversion and format spec to a value"""
+    if conversion == "r":
+        value = repr(value)
+    elif conversion == "a":
+        value = ascii(value)
+    elif conversion == "s":
+        value = str(value)
+    elif conversion:
+        raise ValueError(f"Unknown conversion specifier {conversion}")
+    return format(value, spec) if spec else str(value)
+
+
+def _render_field(
+    kwargs: Dict[str, Any], field: str, spec: str, conversion: Optional[str]
+) -> str:
+    """Render one replacement field, expanding nested fields in its spec"""
+    value = kwargs[field]
+    if "{" in spec:
+        # As in str.format, e.g. "{x:{width}}" takes its width from kwargs
+        spec = "".join(
+            literal + ("" if name is None else _format_value(kwargs[name], inner, conv))
+            for literal, name, inner, conv in _compile_template(spec)
+        )
+    return _format_value(value, spec, conversion)
+
+
+def _normalize_default_prompt(prompt_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a copy of a default prompt with its template dedented and stripped"""
+    return {
+        **prompt_data,
+        "template": textwrap.dedent(prompt_data["template"]).strip(),
+    }
+
 
 class PromptManager:
     """Manages prompt operations"""
 
+    __slots__ = ("db_manager", "config", "_get_prompt_cached", "_query_cache")
+
     def __init__(self, db_manager: DatabaseManager, config: Dict[str, Any]):
         self.db_manager = db_manager
         self.config = config
+        self._get_prompt_cached = lru_cache(maxsize=_PROMPT_CACHE_SIZE)(
+            self._get_prompt_uncached
+        )
+        self._query_cache: Dict[tuple, Tuple[float, List[Dict[str, Any]]]] = {}
         self._ensure_default_prompts()
 
     def _ensure_default_prompts(self):
-        """Ensure default prompts are loaded"""
-        # Check if we have any prompts
-        all_prompts = self.db_manager.get_all_prompts()
-        if not all_prompts:
-            self._create_default_prompts()
+        """Ensure default prompts are loaded.
+
+        The SHA-1 of the defaults file is recorded in the database, so warm
+        starts with an unchanged file skip loading and comparing prompts.
+        """
+        try:
+            defaults_hash = hashlib.sha1(_DEFAULT_PROMPTS_FILE.read_bytes()).hexdigest()
+        except OSError:
+            defaults_hash = None
+
+        stored_hash = self.db_manager.get_meta(_DEFAULTS_HASH_KEY)
+        if defaults_hash and stored_hash == defaults_hash:
+            return
+
+        # Only record the hash once the defaults were actually loaded, so a
+        # failed load (e.g. PyYAML missing) is retried on the next start
+        if self._create_default_prompts() and defaults_hash:
+            self.db_manager.set_meta(_DEFAULTS_HASH_KEY, defaults_hash)
 
     def _load_default_prompts_from_yaml(self) -> Dict[str, Dict[str, Any]]:
         """Load default prompts from YAML file"""
@@ -34,10 +133,7 @@ class PromptManager:
             logger.warning("PyYAML not available, falling back to empty prompts")
             return {}
 
-        # Find the prompts directory relative to this module
-        module_dir = Path(__file__).parent
-        prompts_dir = module_dir.parent / "prompts"
-        yaml_file = prompts_dir / "default_prompts.yaml"
+        yaml_file = _DEFAULT_PROMPTS_FILE
 
         if not yaml_file.exists():
             logger.warning(f"Default prompts file not found: {yaml_file}")
@@ -54,13 +150,22 @@ class PromptManager:
             logger.error(f"Error loading default prompts from YAML: {e}")
             return {}
 
-    def _create_default_prompts(self):
-        """Create default prompts if they don't exist"""
+    def _create_default_prompts(self) -> bool:
+        """Create default prompts if they don't exist.
+
+        Returns False when no default prompts could be loaded.
+        """
         default_prompts = self._load_default_prompts_from_yaml()
+        if not default_prompts:
+            return False
+
+        existing_ids = {prompt["id"] for prompt in self.db_manager.get_all_prompts()}
 
-        # Store default prompts in database
+        # Store missing default prompts (keeps usage stats of existing ones)
         for prompt_data in default_prompts.values():
-            self.db_manager.store_prompt(prompt_data)
+            if prompt_data.get("id") not in existing_ids:
+                self.db_manager.store_prompt(_normalize_default_prompt(prompt_data))
+        return True
 
     def search_prompts(
         self, query: str, category: Optional[str] = None, limit: int = 10
@@ -69,55 +174,129 @@ class PromptManager:
         return self.db_manager.search_prompts(query, category, limit)
 
     def get_prompt(self, prompt_id: str) -> Optional[Dict[str, Any]]:
-        """Get a specific prompt by ID"""
+        """Get a specific prompt by ID (cached; returns a copy)"""
+        return copy.deepcopy(self._get_prompt_cached(prompt_id))
+
+    def get_prompts(self, prompt_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get several prompts by ID with a single database query"""
+        return self.db_manager.get_prompts(prompt_ids)
+
+    def render(self, prompt_id: str, **kwargs: Any) -> Optional[str]:
+        """Render a prompt template with the given variables.
+
+        Templates are parsed once and cached, so rendering is a join over the
+        precompiled segments. Nested fields in a format spec are expanded as
+        str.format does. Extra kwargs are ignored, and placeholders without a
+        value or whose value rejects the spec are left in place exactly as
+        written, so literal braces such as JSON examples survive. Templates
+        that do not parse (e.g. unbalanced braces) are returned unrendered.
+        """
+        # Read-only use, so the cached row is used directly without a copy
+        prompt = self._get_prompt_cached(prompt_id)
+        if prompt is None:
+            return None
+
+        template = prompt["template"]
+        try:
+            segments = _compile_template(template)
+        except ValueError as e:
+            logger.warning(f"Prompt {prompt_id} has a malformed template: {e}")
+            return template
+
+        parts = []
+        for literal, field, spec, conversion in segments:
+            parts.append(literal)
+            if field is None:
+                continue
+            try:
+                parts.append(_render_field(kwargs, field, spec, conversion))
+            except (KeyError, ValueError, TypeError):
+                # A value is missing or rejects the spec, so re-emit the
+                # placeholder with its original conversion/spec
+                parts.append("{" + field)
+                if conversion:
+                    parts.append("!" + conversion)
+                if spec:
+                    parts.append(":" + spec)
+                parts.append("}")
+        return "".join(parts)
+
+    def _get_prompt_uncached(self, prompt_id: str) -> Optional[Dict[str, Any]]:
+        """Get a specific prompt by ID directly from the database"""
         return self.db_manager.get_prompt(prompt_id)
 
+    def _cached_query(
+        self, key: tuple, loader: Callable[[], List[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """Return a copy of a cached query result, reloading it once the TTL expires"""
+        now = time.monotonic()
+        entry = self._query_cache.get(key)
+        if entry is not None and now - entry[0] < _QUERY_CACHE_TTL:
+            return copy.deepcopy(entry[1])
+
+        result = loader()
+        cache = self._query_cache
+        if key not in cache and len(cache) >= _QUERY_CACHE_SIZE:
+            # Evict the oldest entry (dicts preserve insertion order)
+            cache.pop(next(iter(cache)))
+        cache[key] = (now, result)
+        return copy.deepcopy(result)
+
+    def _invalidate_cache(self):
+        """Drop all cached prompt reads after a write"""
+        self._get_prompt_cached.cache_clear()
+        self._query_cache.clear()
+
     def suggest_prompts(self, context: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Suggest prompts based on context (cached)"""
+        # Missing, empty and whitespace-only contexts all mean "popular prompts"
+        if not context or context.isspace():
+            return self._get_popular_prompts()
+
+        return self._cached_query(
+            ("suggest", context), lambda: self._suggest_prompts_uncached(context)
+        )
+
+    def _get_popular_prompts(self) -> List[Dict[str, Any]]:
+        """Get the most used prompts (cached)"""
+        return self._cached_query(
+            ("popular",), lambda: self.db_manager.get_popular_prompts(limit=5)
+        )
+
+    def _suggest_prompts_uncached(self, context: str) -> List[Dict[str, Any]]:
         """Suggest prompts based on context"""
         # Simple implementation - can be enhanced with ML
         suggestions = []
 
-        if context:
-            # Analyze context for keywords
-            context_lower = context.lower()
-
-            # Map keywords to categories
-            keyword_categories = {
-                "review": ["code-quality"],
-                "test": ["testing"],
-                "api": ["api", "documentation"],
-                "security": ["security"],
-                "refactor": ["refactoring"],
-                "architecture": ["architecture"],
-                "document": ["documentation"],
-            }
-
-            relevant_categories = set()
-            for keyword, categories in keyword_categories.items():
-                if keyword in context_lower:
-                    relevant_categories.update(categories)
-
-            if relevant_categories:
-                for category in relevant_categories:
-                    category_prompts = self.get_prompts_by_category(category, limit=2)
-                    suggestions.extend(category_prompts)
+        # Analyze context for keywords in a single scan
+        relevant_categories = set()
+        for keyword in set(_KEYWORD_PATTERN.findall(context.lower())):
+            relevant_categories.update(_KEYWORD_CATEGORIES[keyword])
+
+        for category in relevant_categories:
+            category_prompts = self.get_prompts_by_category(category, limit=2)
+            suggestions.extend(category_prompts)
 
         # If no context-specific suggestions, return popular prompts
         if not suggestions:
-            suggestions = self.db_manager.get_popular_prompts(limit=5)
+            suggestions = self._get_popular_prompts()
 
         return suggestions
 
     def get_prompts_by_category(
         self, category: str, limit: int = 10
     ) -> List[Dict[str, Any]]:
-        """Get prompts by category"""
-        return self.db_manager.get_prompts_by_category(category, limit)
+        """Get prompts by category (cached)"""
+        return self._cached_query(
+            ("category", category, limit),
+            lambda: self.db_manager.get_prompts_by_category(category, limit),
+        )
 
     def create_custom_prompt(self, prompt_data: Dict[str, Any]) -> str:
         """Create a new custom prompt"""
-        prompt_id = prompt_data.get("id", f"custom_{int(__import__('time').time())}")
-        self.db_manager.store_prompt(prompt_data)
+        prompt_id = prompt_data.get("id") or f"custom_{next(_ID_COUNTER):x}"
+        self.db_manager.store_prompt({**prompt_data, "id": prompt_id})
+        self._invalidate_cache()
         return prompt_id
 
     def record_prompt_usage(
@@ -125,6 +304,8 @@ class PromptManager:
     ):
         """Record prompt usage for analytics"""
         self.db_manager.record_prompt_usage(prompt_id, context, effectiveness)
+        # Usage counts and scores drive result ordering
+        self._invalidate_cache()
 
     def get_usage_stats(self) -> List[Dict[str, Any]]:
         """Get usage statistics for all prompts"""
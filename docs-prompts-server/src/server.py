@@ -3,8 +3,11 @@ Main facade for the Documentation and Prompts MCP Server
 Follows SOLID principles with dependency injection
 """
 
+import asyncio
+import functools
 import logging
 import os
+import threading
 from pathlib import Path
 from typing import Optional
 
@@ -12,15 +15,46 @@ from config import ConfigurationManager
 from database import DatabaseManager
 from document_indexer import DocumentIndexer
 from prompt_manager import PromptManager
-from gui_manager import GUIManager
-from mcp_handler import MCPHandler
 
 logger = logging.getLogger(__name__)
 
+# Server-relative locations, resolved once at import
+_SERVER_DIR = Path(__file__).resolve().parent.parent
+_DB_PATH = _SERVER_DIR / ".docs_prompts_index.db"
+_CONFIG_PATH = _SERVER_DIR / "config" / "server_config.yaml"
+
+# Entries marking the monorepo root and a server subdirectory
+_MONOREPO_INDICATORS = frozenset({"README.md", ".git"})
+_SERVER_INDICATORS = frozenset({"src", "config"})
+_SERVER_DIR_NAMES = frozenset({"docs-prompts-server", "ruff-server", "coverage-server"})
+
+
+def _list_dir_names(path: Path) -> frozenset:
+    """Return the entry names of a directory in a single scandir pass"""
+    try:
+        with os.scandir(path) as entries:
+            return frozenset(entry.name for entry in entries)
+    except OSError:
+        return frozenset()
+
 
 class DocumentationPromptsServer:
     """Main facade coordinating all server components"""
 
+    __slots__ = (
+        "project_root",
+        "config_manager",
+        "db_manager",
+        "document_indexer",
+        "prompt_manager",
+        "gui_manager",
+        "_mcp_handler",
+        "_auto_index_task",
+    )
+
+    _config_path_cache: Optional[Path] = None
+    _config_path_checked = False
+
     def __init__(self, project_root: Optional[str] = None):
         # Determine project root
         if project_root is None:
@@ -36,93 +70,122 @@ class DocumentationPromptsServer:
             config_path=self._get_config_path(), project_root=self.project_root
         )
 
-        self.db_manager = DatabaseManager(self._get_db_path())
+        db_path = self._get_db_path()
+        self.db_manager = DatabaseManager(db_path)
         self.document_indexer = DocumentIndexer(
             self.config_manager.config, self.project_root, self.db_manager
         )
         self.prompt_manager = PromptManager(self.db_manager, self.config_manager.config)
-        self.gui_manager = GUIManager(self._get_db_path(), self)
-        self.mcp_handler = MCPHandler(
-            self.document_indexer,
-            self.prompt_manager,
-            self.db_manager,
-            self.config_manager.config,
-            self._get_db_path(),
-        )
+        self._mcp_handler = None
+        self.gui_manager = None
 
         # Auto-index documents on startup if configured
+        self._auto_index_task: Optional[asyncio.Task] = None
         indexing_config = self.config_manager.config.get("indexing", {})
         if indexing_config.get("auto_index_on_startup", False):
             logger.info("Auto-indexing documents on startup...")
             try:
-                import asyncio
-
-                # Run indexing in background to not block startup
-                import threading
-
-                def auto_index():
-                    try:
-                        result = asyncio.run(self.index_all_documents())
-                        logger.info(f"Auto-indexing complete: {result}")
-                    except Exception as e:
-                        logger.error(f"Auto-indexing failed: {e}")
-
-                threading.Thread(target=auto_index, daemon=True).start()
+                self._start_auto_index()
             except Exception as e:
                 logger.error(f"Failed to start auto-indexing: {e}")
 
-        # Launch GUI
-        self.gui_manager.launch_gui()
+        # Launch GUI unless disabled (headless deployments skip the tk import)
+        gui_config = self.config_manager.config.get("gui", {})
+        if gui_config.get("launch_on_startup", True):
+            from gui_manager import GUIManager
+
+            self.gui_manager = GUIManager(db_path, self)
+            self.gui_manager.launch_gui()
+
+    @property
+    def mcp_handler(self):
+        """MCP protocol handler, created (and the mcp package imported) on first use"""
+        if self._mcp_handler is None:
+            from mcp_handler import MCPHandler
+
+            self._mcp_handler = MCPHandler(
+                self.document_indexer,
+                self.prompt_manager,
+                self.db_manager,
+                self.config_manager.config,
+                self._get_db_path(),
+            )
+        return self._mcp_handler
+
+    def _start_auto_index(self):
+        """Schedule background indexing without blocking startup.
+
+        When constructed inside a running event loop the indexing coroutine
+        is scheduled as a task on that loop; otherwise it falls back to a
+        daemon thread hosting its own loop.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
 
-    def _detect_project_root(self, initial_root: Path) -> Path:
+        if loop is not None:
+            self._auto_index_task = loop.create_task(self.index_all_documents())
+            self._auto_index_task.add_done_callback(self._on_auto_index_done)
+            return
+
+        def auto_index():
+            try:
+                result = asyncio.run(self.index_all_documents())
+                logger.info(f"Auto-indexing complete: {result}")
+            except Exception as e:
+                logger.error(f"Auto-indexing failed: {e}")
+
+        threading.Thread(target=auto_index, daemon=True).start()
+
+    @staticmethod
+    def _on_auto_index_done(task: asyncio.Task):
+        """Log the outcome of the background indexing task"""
+        if task.cancelled():
+            logger.info("Auto-indexing cancelled")
+        elif task.exception() is not None:
+            logger.error(f"Auto-indexing failed: {task.exception()}")
+        else:
+            logger.info(f"Auto-indexing complete: {task.result()}")
+
+    @staticmethod
+    @functools.lru_cache(maxsize=16)
+    def _detect_project_root(initial_root: Path) -> Path:
         """Auto-detect the correct project root.
-        
+
         If running from a server subdirectory, check if the parent directory
-        appears to be the monorepo root and adjust accordingly.
+        appears to be the monorepo root and adjust accordingly. Each directory
+        is listed once with ``os.scandir`` and results are memoised per root.
         """
-        # Check if parent directory looks like monorepo root
-        parent_dir = initial_root.parent
-        
-        # Indicators that parent is monorepo root
-        monorepo_indicators = [
-            parent_dir / "README.md",
-            parent_dir / ".git",
-        ]
-        
         # Check if we're in a server subdirectory
-        server_indicators = [
-            initial_root / "src",
-            initial_root / "config",
-            initial_root.name in ["docs-prompts-server", "ruff-server",
-                                 "coverage-server"]
-        ]
-        
+        in_server_dir = initial_root.name in _SERVER_DIR_NAMES or bool(
+            _SERVER_INDICATORS & _list_dir_names(initial_root)
+        )
+        if not in_server_dir:
+            return initial_root
+
         # If parent has monorepo indicators and we're in server directory,
         # use parent as project root
-        parent_is_monorepo = all(indicator.exists()
-                                for indicator in monorepo_indicators)
-        in_server_dir = (any(indicator.exists()
-                             for indicator in server_indicators[:-1]) or
-                         server_indicators[-1])
-        
-        if parent_is_monorepo and in_server_dir:
+        parent_dir = initial_root.parent
+        if _MONOREPO_INDICATORS <= _list_dir_names(parent_dir):
             logger.info(f"Detected monorepo root at: {parent_dir}")
             return parent_dir
-        
+
         # Otherwise use the initial root
         return initial_root
 
-    def _get_config_path(self) -> Optional[Path]:
-        """Get the configuration file path"""
-        # Look for config file relative to the server module location
-        server_dir = Path(__file__).parent.parent
-        config_path = server_dir / "config" / "server_config.yaml"
-        return config_path if config_path.exists() else None
+    @classmethod
+    def _get_config_path(cls) -> Optional[Path]:
+        """Get the configuration file path (existence checked once)"""
+        if not cls._config_path_checked:
+            cls._config_path_cache = _CONFIG_PATH if _CONFIG_PATH.exists() else None
+            cls._config_path_checked = True
+        return cls._config_path_cache
 
-    def _get_db_path(self) -> Path:
+    @staticmethod
+    def _get_db_path() -> Path:
         """Get the database file path"""
-        server_dir = Path(__file__).parent.parent
-        return server_dir / ".docs_prompts_index.db"
+        return _DB_PATH
 
     # Delegate methods to appropriate components
     async def index_all_documents(self):
@@ -153,6 +216,10 @@ class DocumentationPromptsServer:
         """Get a specific prompt"""
         return self.prompt_manager.get_prompt(prompt_id)
 
+    def get_prompts(self, prompt_ids):
+        """Get several prompts at once"""
+        return self.prompt_manager.get_prompts(prompt_ids)
+
     def suggest_prompts(self, context=None):
         """Suggest prompts based on context"""
         return self.prompt_manager.suggest_prompts(context)
@@ -0,0 +1,47 @@
+"""
+Fallback MCP stand-ins for Ruff Server
+======================================
+Minimal replacements for the MCP objects the servers use, imported only when
+the mcp package is not installed (development mode).
+"""
+
+
+class _Tool:
+    __slots__ = ("name", "description", "inputSchema")
+
+    def __init__(self, *, name: str, description: str, inputSchema: dict):
+        self.name = name
+        self.description = description
+        self.inputSchema = inputSchema
+
+
+class _TextContent:
+    __slots__ = ("type", "text")
+
+    def __init__(self, *, type: str, text: str):
+        self.type = type
+        self.text = text
+
+
+class types:
+    Tool = _Tool
+    TextContent = _TextContent
+
+
+class Server:
+    def __init__(self, name: str, version: str):
+        pass
+
+    def list_tools(self):
+        return lambda func: func
+
+    def call_tool(self):
+        return lambda func: func
+
+
+class NotificationOptions:
+    pass
+
+
+class InitializationOptions:
+    pass
@@ -4,16 +4,35 @@ Configuration management for Ruff MCP Server
 Handles discovery and management of Ruff configuration files.
 """
 
+import functools
+import os
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
+
+
+@functools.lru_cache(maxsize=64)
+def _find_pyproject_cached(root_str: str) -> Optional[Path]:
+    """Find pyproject.toml walking up from root_str (memoised per process)."""
+    current = root_str
+    while True:
+        candidate = os.path.join(current, "pyproject.toml")
+        if os.path.exists(candidate):
+            return Path(candidate)
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
 
 
 class ConfigurationManager:
     """Manages Ruff configuration file discovery and settings."""
 
+    __slots__ = ("project_root", "_pyproject_toml", "_config_args")
+
     def __init__(self, project_root: Path):
         self.project_root = project_root
         self._pyproject_toml: Optional[Path] = None
+        self._config_args: Optional[Tuple[str, ...]] = None
 
     @property
     def pyproject_toml(self) -> Optional[Path]:
@@ -24,14 +43,17 @@ class ConfigurationManager:
 
     def _find_pyproject_toml(self) -> Optional[Path]:
         """Find pyproject.toml configuration file in project hierarchy."""
-        for path in [self.project_root, *self.project_root.parents]:
-            pyproject_path = path / "pyproject.toml"
-            if pyproject_path.exists():
-                return pyproject_path
-        return None
-
-    def get_config_args(self) -> list[str]:
-        """Get configuration arguments for ruff commands."""
-        if self.pyproject_toml:
-            return ["--config", str(self.pyproject_toml)]
-        return []
+        return _find_pyproject_cached(os.path.abspath(self.project_root))
+
+    def get_config_args(self) -> Tuple[str, ...]:
+        """Get configuration arguments for ruff commands.
+
+        The tuple is built once and shared; callers extend their own
+        command lists with it.
+        """
+        if self._config_args is None:
+            pyproject = self.pyproject_toml
+            self._config_args = (
+                ("--config", os.fspath(pyproject)) if pyproject else ()
+            )
+        return self._config_args
@@ -10,6 +10,14 @@ from pathlib import Path
 
 from server import RuffMCPServer
 
+# Prefer uvloop's libuv-based event loop where available
+try:
+    import uvloop
+
+    _run = uvloop.run
+except ImportError:
+    _run = asyncio.run
+
 
 async def main():
     """Main entry point for the Ruff MCP server."""
@@ -27,4 +35,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    _run(main())
@@ -4,60 +4,366 @@ MCP protocol handling for Ruff Server
 Manages MCP tool definitions and protocol interactions.
 """
 
-from typing import Any, Dict, List
+from __future__ import annotations
 
-# MCP imports (these would be installed as dependencies)
-try:
-    from mcp import types
+import asyncio
+import importlib.util
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from models import (
+    CommandResult,
+    RuffCheckConfig,
+    RuffCheckDiffConfig,
+    RuffExplainRuleConfig,
+    RuffFormatConfig,
+    RuffShowSettingsConfig,
+)
+from result_cache import SETTINGS_CACHE_TTL, ResultCache, config_mtimes
 
-    HAS_MCP = True
-except ImportError:
-    HAS_MCP = False
+if TYPE_CHECKING:
+    from ruff_runner import RuffRunner
 
+# MCP imports (these would be installed as dependencies)
+HAS_MCP = importlib.util.find_spec("mcp") is not None
+if HAS_MCP:
+    from mcp import types
+else:
     # Fallback for development without MCP
-    class types:
-        @staticmethod
-        def Tool(**kwargs):
-            return kwargs
+    from _mcp_stubs import types
+
+
+# Static error response, built once and shared (only the list is per call)
+_RULE_REQUIRED_CONTENT = types.TextContent(
+    type="text", text="❌ Rule code is required (e.g., 'E501', 'F401')"
+)
+_NO_CHANGES_CONTENT = types.TextContent(
+    type="text",
+    text="✅ Ruff check-diff passed - no issues found!\n\nNo Python files changed",
+)
+
+
+# JSON schema for ruff-check tool.
+_RUFF_CHECK_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "path": {
+            "type": "string",
+            "description": "Path to check (file or directory)",
+            "default": ".",
+        },
+        "fix": {
+            "type": "boolean",
+            "description": "Automatically fix issues where possible",
+            "default": False,
+        },
+        "format": {
+            "type": "string",
+            "enum": [
+                "text",
+                "json",
+                "github",
+                "gitlab",
+                "junit",
+                "sarif",
+            ],
+            "description": "Output format",
+            "default": "text",
+        },
+        "select": {
+            "type": "string",
+            "description": "Comma-separated list of rule codes to select",
+        },
+        "ignore": {
+            "type": "string",
+            "description": "Comma-separated list of rule codes to ignore",
+        },
+        "show_fixes": {
+            "type": "boolean",
+            "description": "Show available fixes for issues",
+            "default": False,
+        },
+        "no_cache": {
+            "type": "boolean",
+            "description": "Bypass Ruff's cache (for debugging)",
+            "default": False,
+        },
+    },
+    "required": [],
+}
+
+
+# JSON schema for ruff-format tool.
+_RUFF_FORMAT_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "path": {
+            "type": "string",
+            "description": "Path to format (file or directory)",
+            "default": ".",
+        },
+        "check": {
+            "type": "boolean",
+            "description": "Only check formatting without making changes",
+            "default": False,
+        },
+        "diff": {
+            "type": "boolean",
+            "description": "Show diff of formatting changes",
+            "default": False,
+        },
+        "no_cache": {
+            "type": "boolean",
+            "description": "Bypass Ruff's cache (for debugging)",
+            "default": False,
+        },
+    },
+    "required": [],
+}
+
+
+# JSON schema for ruff-check-diff tool.
+_RUFF_CHECK_DIFF_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "base": {
+            "type": "string",
+            "description": "Base commit/branch to compare against",
+            "default": "HEAD~1",
+        },
+        "format": {
+            "type": "string",
+            "enum": ["text", "json", "github"],
+            "description": "Output format",
+            "default": "text",
+        },
+    },
+    "required": [],
+}
+
+
+# JSON schema for ruff-show-settings tool.
+_RUFF_SHOW_SETTINGS_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "path": {
+            "type": "string",
+            "description": "Path to show settings for",
+            "default": ".",
+        }
+    },
+    "required": [],
+}
+
+
+# JSON schema for ruff-explain-rule tool.
+_RUFF_EXPLAIN_RULE_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "rule": {
+            "type": "string",
+            "description": "Rule code to explain (e.g., 'E501', 'F401')",
+        }
+    },
+    "required": ["rule"],
+}
+
+
+_TOOL_SCHEMAS: Dict[str, Dict[str, Any]] = {
+    "ruff-check": _RUFF_CHECK_SCHEMA,
+    "ruff-format": _RUFF_FORMAT_SCHEMA,
+    "ruff-check-diff": _RUFF_CHECK_DIFF_SCHEMA,
+    "ruff-show-settings": _RUFF_SHOW_SETTINGS_SCHEMA,
+    "ruff-explain-rule": _RUFF_EXPLAIN_RULE_SCHEMA,
+}
+
+# Per-tool argument names and defaults, derived from the schemas above
+_TOOL_ARG_NAMES: Dict[str, frozenset] = {
+    name: frozenset(schema["properties"]) for name, schema in _TOOL_SCHEMAS.items()
+}
+_TOOL_ARG_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    name: {
+        key: prop["default"]
+        for key, prop in schema["properties"].items()
+        if "default" in prop
+    }
+    for name, schema in _TOOL_SCHEMAS.items()
+}
+
+
+def _normalize_args(tool_name: str, args: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge tool arguments over schema defaults, dropping unknown and None values."""
+    allowed = _TOOL_ARG_NAMES[tool_name]
+    return {
+        **_TOOL_ARG_DEFAULTS[tool_name],
+        **{k: v for k, v in (args or {}).items() if v is not None and k in allowed},
+    }
+
+
+# Per-tool time budgets in seconds; a hung ruff process is killed on expiry
+_TOOL_TIMEOUTS: Dict[str, float] = {
+    "ruff-check": 120,
+    "ruff-format": 60,
+    "ruff-check-diff": 60,
+    "ruff-show-settings": 15,
+    "ruff-explain-rule": 10,
+}
+
+
+def _result_prefixes(command_name: str) -> Tuple[str, str, str]:
+    """Response prefixes for (passed, completed, failed) command results."""
+    return (
+        f"✅ {command_name} passed - no issues found!",
+        f"✅ {command_name} completed successfully!",
+        f"❌ {command_name} found issues:\n\n",
+    )
+
+
+# Prefixes for the fixed command names; rule explanations are built per call
+_RESULT_PREFIXES: Dict[str, Tuple[str, str, str]] = {
+    name: _result_prefixes(name)
+    for name in ("Ruff check", "Ruff format", "Ruff check-diff", "Ruff show-settings")
+}
+
+
+class _RunCoalescer:
+    """Share ruff runs between identical concurrent requests.
+
+    Requests are keyed by their (frozen, hashable) config. A run that has
+    already started is never joined, since it may have read files older than
+    the request. Instead, identical requests arriving while a run is in
+    flight are parked on one queued follow-up run, which starts once the
+    current run finishes and serves all of them. Runs that modify files
+    (``shareable`` returns False) are never shared. When the last waiter of
+    a run is cancelled (e.g. a tool timeout), the run is cancelled too, so
+    its ruff process is killed.
+    """
+
+    __slots__ = ("_run", "_shareable", "_running", "_queued")
+
+    def __init__(
+        self,
+        run: Callable[[Any], Awaitable[Any]],
+        shareable: Callable[[Any], bool],
+    ):
+        self._run = run
+        self._shareable = shareable
+        # config -> [future, number of callers awaiting it]
+        self._running: Dict[Any, list] = {}
+        self._queued: Dict[Any, list] = {}
+
+    async def submit(self, config):
+        if not self._shareable(config):
+            return await self._run(config)
+
+        entry = self._queued.get(config)
+        if entry is None:
+            running = self._running.get(config)
+            entry = [None, 0]
+            if running is None:
+                self._running[config] = entry
+                entry[0] = asyncio.ensure_future(self._run(config))
+            else:
+                self._queued[config] = entry
+                entry[0] = asyncio.ensure_future(
+                    self._run_after(config, running[0], entry)
+                )
+            entry[0].add_done_callback(lambda _: self._forget(config, entry))
+        future = entry[0]
 
-        @staticmethod
-        def TextContent(**kwargs):
-            return kwargs
+        entry[1] += 1
+        try:
+            # Shield so one caller's cancellation does not cancel the shared run
+            return await asyncio.shield(future)
+        finally:
+            entry[1] -= 1
+            if not entry[1] and not future.done():
+                # Nobody is waiting any more; stop the run instead of leaking it
+                future.cancel()
+
+    async def _run_after(self, config, previous: asyncio.Future, entry: list):
+        """Start a queued run once the in-flight run for config finishes."""
+        await asyncio.wait((previous,))
+        # From here on the run has started, so new requests queue behind it
+        if self._queued.get(config) is entry:
+            del self._queued[config]
+        self._running[config] = entry
+        return await self._run(config)
+
+    def _forget(self, config, entry: list) -> None:
+        # A newer run for the same config may already have replaced this one
+        for table in (self._running, self._queued):
+            if table.get(config) is entry:
+                del table[config]
 
 
 class MCPHandler:
     """Handles MCP protocol interactions and tool definitions."""
 
-    def __init__(self, ruff_runner):
+    __slots__ = (
+        "ruff_runner",
+        "_timeouts",
+        "_tools",
+        "_check_coalescer",
+        "_format_coalescer",
+        "_result_cache",
+        "_dispatch",
+    )
+
+    def __init__(
+        self, ruff_runner: RuffRunner, timeouts: Optional[Dict[str, float]] = None
+    ):
         self.ruff_runner = ruff_runner
+        self._timeouts = {**_TOOL_TIMEOUTS, **(timeouts or {})}
+        self._tools = self._build_tools()
+        self._check_coalescer = _RunCoalescer(
+            ruff_runner.run_check, lambda config: not config.fix
+        )
+        # Only --check/--diff runs are read-only; like checks, a request for
+        # one that is already running waits for a fresh follow-up run
+        self._format_coalescer = _RunCoalescer(
+            ruff_runner.run_format, lambda config: bool(config.check or config.diff)
+        )
+        self._result_cache = ResultCache(lambda result: result.success)
+        self._dispatch = {
+            "ruff-check": self._handle_ruff_check,
+            "ruff-format": self._handle_ruff_format,
+            "ruff-check-diff": self._handle_ruff_check_diff,
+            "ruff-show-settings": self._handle_ruff_show_settings,
+            "ruff-explain-rule": self._handle_ruff_explain_rule,
+        }
 
     def get_tools(self) -> List[types.Tool]:
-        """Get list of available MCP tools."""
+        """Get list of available MCP tools (built once, shared across calls)."""
+        return self._tools
+
+    @staticmethod
+    def _build_tools() -> List[types.Tool]:
+        """Build the MCP tool definitions from the module-level schemas."""
         return [
             types.Tool(
                 name="ruff-check",
                 description="Run Ruff linter to identify code issues",
-                inputSchema=self._get_ruff_check_schema(),
+                inputSchema=_RUFF_CHECK_SCHEMA,
             ),
             types.Tool(
                 name="ruff-format",
                 description="Format Python code using Ruff (Black-compatible)",
-                inputSchema=self._get_ruff_format_schema(),
+                inputSchema=_RUFF_FORMAT_SCHEMA,
             ),
             types.Tool(
                 name="ruff-check-diff",
                 description="Check Ruff issues on changed files only (git diff)",
-                inputSchema=self._get_ruff_check_diff_schema(),
+                inputSchema=_RUFF_CHECK_DIFF_SCHEMA,
             ),
             types.Tool(
                 name="ruff-show-settings",
                 description="Show active Ruff configuration settings",
-                inputSchema=self._get_ruff_show_settings_schema(),
+                inputSchema=_RUFF_SHOW_SETTINGS_SCHEMA,
             ),
             types.Tool(
                 name="ruff-explain-rule",
                 description="Explain a specific Ruff rule",
-                inputSchema=self._get_ruff_explain_rule_schema(),
+                inputSchema=_RUFF_EXPLAIN_RULE_SCHEMA,
             ),
         ]
 
@@ -66,18 +372,18 @@ class MCPHandler:
     ) -> List[types.TextContent]:
         """Handle tool calls."""
         try:
-            if name == "ruff-check":
-                return await self._handle_ruff_check(arguments)
-            elif name == "ruff-format":
-                return await self._handle_ruff_format(arguments)
-            elif name == "ruff-check-diff":
-                return await self._handle_ruff_check_diff(arguments)
-            elif name == "ruff-show-settings":
-                return await self._handle_ruff_show_settings(arguments)
-            elif name == "ruff-explain-rule":
-                return await self._handle_ruff_explain_rule(arguments)
-            else:
+            handler = self._dispatch.get(name)
+            if handler is None:
                 return [types.TextContent(type="text", text=f"Unknown tool: {name}")]
+            timeout = self._timeouts[name]
+            try:
+                return await asyncio.wait_for(handler(arguments), timeout=timeout)
+            except asyncio.TimeoutError:
+                return [
+                    types.TextContent(
+                        type="text", text=f"⏱ {name} timed out after {timeout}s"
+                    )
+                ]
         except Exception as e:
             return [
                 types.TextContent(
@@ -87,208 +393,134 @@ class MCPHandler:
 
     async def _handle_ruff_check(self, args: Dict[str, Any]) -> List[types.TextContent]:
         """Handle ruff-check tool call."""
-        from models import RuffCheckConfig
-
-        config = RuffCheckConfig(
-            path=args.get("path", "."),
-            fix=args.get("fix", False),
-            format=args.get("format", "text"),
-            select=args.get("select"),
-            ignore=args.get("ignore"),
-            show_fixes=args.get("show_fixes", False),
-        )
+        config = RuffCheckConfig(**_normalize_args("ruff-check", args))
 
-        result = await self.ruff_runner.run_check(config)
-        return [self._format_command_result("Ruff check", result)]
+        if config.format == "json":
+            result = await self._check_coalescer.submit(config)
+            return self._format_json_result("Ruff check", result)
+        return await self._dispatch_simple(
+            "Ruff check", self._check_coalescer.submit, config
+        )
 
     async def _handle_ruff_format(
         self, args: Dict[str, Any]
     ) -> List[types.TextContent]:
         """Handle ruff-format tool call."""
-        from models import RuffFormatConfig
+        config = RuffFormatConfig(**_normalize_args("ruff-format", args))
 
-        config = RuffFormatConfig(
-            path=args.get("path", "."),
-            check=args.get("check", False),
-            diff=args.get("diff", False),
+        return await self._dispatch_simple(
+            "Ruff format", self._format_coalescer.submit, config
         )
 
-        result = await self.ruff_runner.run_format(config)
-        return [self._format_command_result("Ruff format", result)]
-
     async def _handle_ruff_check_diff(
         self, args: Dict[str, Any]
     ) -> List[types.TextContent]:
         """Handle ruff-check-diff tool call."""
-        from models import RuffCheckDiffConfig
+        config = RuffCheckDiffConfig(**_normalize_args("ruff-check-diff", args))
 
-        config = RuffCheckDiffConfig(
-            base=args.get("base", "HEAD~1"),
-            format=args.get("format", "text"),
-        )
+        # Ask git first so the common "nothing changed" case never spawns ruff
+        try:
+            changed_files = await self.ruff_runner.get_changed_files(config.base)
+        except Exception as e:
+            result = CommandResult(
+                returncode=1, stdout="", stderr=str(e), success=False
+            )
+            return [self._format_command_result("Ruff check-diff", result)]
 
-        result = await self.ruff_runner.run_check_diff(config)
+        if not changed_files:
+            return [_NO_CHANGES_CONTENT]
+
+        result = await self.ruff_runner.run_check_diff(config, changed_files)
         return [self._format_command_result("Ruff check-diff", result)]
 
     async def _handle_ruff_show_settings(
         self, args: Dict[str, Any]
     ) -> List[types.TextContent]:
         """Handle ruff-show-settings tool call."""
-        from models import RuffShowSettingsConfig
-
-        config = RuffShowSettingsConfig(
-            path=args.get("path", "."),
+        config = RuffShowSettingsConfig(**_normalize_args("ruff-show-settings", args))
+
+        return await self._dispatch_simple(
+            "Ruff show-settings",
+            self.ruff_runner.run_show_settings,
+            config,
+            cache_key=("ruff-show-settings", config.path, self._config_mtimes()),
+            ttl=SETTINGS_CACHE_TTL,
         )
 
-        result = await self.ruff_runner.run_show_settings(config)
-        return [self._format_command_result("Ruff show-settings", result)]
-
     async def _handle_ruff_explain_rule(
         self, args: Dict[str, Any]
     ) -> List[types.TextContent]:
         """Handle ruff-explain-rule tool call."""
-        from models import RuffExplainRuleConfig
-
         rule = args.get("rule")
         if not rule:
-            return [
-                types.TextContent(
-                    type="text", text="❌ Rule code is required (e.g., 'E501', 'F401')"
-                )
-            ]
+            return [_RULE_REQUIRED_CONTENT]
+
+        return await self._dispatch_simple(
+            f"Ruff rule {rule}",
+            self.ruff_runner.run_explain_rule,
+            RuffExplainRuleConfig(rule=rule),
+            cache_key=("ruff-explain-rule", rule),
+        )
+
+    async def _dispatch_simple(
+        self,
+        label: str,
+        run: Callable[[Any], Awaitable[CommandResult]],
+        config: Any,
+        cache_key: Optional[tuple] = None,
+        ttl: Optional[float] = None,
+    ) -> List[types.TextContent]:
+        """Run a tool's runner for config and format the result.
 
-        config = RuffExplainRuleConfig(rule=rule)
-        result = await self.ruff_runner.run_explain_rule(config)
-        return [self._format_command_result(f"Ruff rule {rule}", result)]
+        With a cache_key, successful results are reused from the result cache.
+        """
+        if cache_key is None:
+            result = await run(config)
+        else:
+            result = await self._result_cache.run(
+                cache_key, lambda: run(config), ttl=ttl
+            )
+        return [self._format_command_result(label, result)]
+
+    def _config_mtimes(self) -> Tuple[Optional[int], ...]:
+        """Modification times of the config files that affect Ruff settings."""
+        return config_mtimes(
+            self.ruff_runner.config_manager.pyproject_toml,
+            self.ruff_runner.project_root,
+        )
 
     def _format_command_result(self, command_name: str, result) -> types.TextContent:
         """Format command result for MCP response."""
+        prefixes = _RESULT_PREFIXES.get(command_name) or _result_prefixes(command_name)
         if result.success:
-            if result.returncode == 0:
-                response = f"✅ {command_name} passed - no issues found!"
-                if result.stdout:
-                    response += f"\n\n{result.stdout}"
-            else:
-                response = f"✅ {command_name} completed successfully!"
-                if result.stdout:
-                    response += f"\n\n{result.stdout}"
+            prefix = prefixes[0] if result.returncode == 0 else prefixes[1]
+            response = prefix
+            if result.stdout:
+                response = "".join((prefix, "\n\n", result.stdout))
         else:
-            response = f"❌ {command_name} found issues:\n\n{result.output}"
+            response = prefixes[2] + result.output
 
         return types.TextContent(type="text", text=response)
 
-    def _get_ruff_check_schema(self) -> Dict[str, Any]:
-        """Get JSON schema for ruff-check tool."""
-        return {
-            "type": "object",
-            "properties": {
-                "path": {
-                    "type": "string",
-                    "description": "Path to check (file or directory)",
-                    "default": ".",
-                },
-                "fix": {
-                    "type": "boolean",
-                    "description": "Automatically fix issues where possible",
-                    "default": False,
-                },
-                "format": {
-                    "type": "string",
-                    "enum": [
-                        "text",
-                        "json",
-                        "github",
-                        "gitlab",
-                        "junit",
-                        "sarif",
-                    ],
-                    "description": "Output format",
-                    "default": "text",
-                },
-                "select": {
-                    "type": "string",
-                    "description": "Comma-separated list of rule codes to select",
-                },
-                "ignore": {
-                    "type": "string",
-                    "description": "Comma-separated list of rule codes to ignore",
-                },
-                "show_fixes": {
-                    "type": "boolean",
-                    "description": "Show available fixes for issues",
-                    "default": False,
-                },
-            },
-            "required": [],
-        }
-
-    def _get_ruff_format_schema(self) -> Dict[str, Any]:
-        """Get JSON schema for ruff-format tool."""
-        return {
-            "type": "object",
-            "properties": {
-                "path": {
-                    "type": "string",
-                    "description": "Path to format (file or directory)",
-                    "default": ".",
-                },
-                "check": {
-                    "type": "boolean",
-                    "description": "Only check formatting without making changes",
-                    "default": False,
-                },
-                "diff": {
-                    "type": "boolean",
-                    "description": "Show diff of formatting changes",
-                    "default": False,
-                },
-            },
-            "required": [],
-        }
-
-    def _get_ruff_check_diff_schema(self) -> Dict[str, Any]:
-        """Get JSON schema for ruff-check-diff tool."""
-        return {
-            "type": "object",
-            "properties": {
-                "base": {
-                    "type": "string",
-                    "description": "Base commit/branch to compare against",
-                    "default": "HEAD~1",
-                },
-                "format": {
-                    "type": "string",
-                    "enum": ["text", "json", "github"],
-                    "description": "Output format",
-                    "default": "text",
-                },
-            },
-            "required": [],
-        }
+    def _format_json_result(
+        self, command_name: str, result: CommandResult
+    ) -> List[types.TextContent]:
+        """Format a JSON-mode result as a status line plus ruff's raw JSON.
 
-    def _get_ruff_show_settings_schema(self) -> Dict[str, Any]:
-        """Get JSON schema for ruff-show-settings tool."""
-        return {
-            "type": "object",
-            "properties": {
-                "path": {
-                    "type": "string",
-                    "description": "Path to show settings for",
-                    "default": ".",
-                }
-            },
-            "required": [],
-        }
+        The payload is passed through untouched, in its own content item, so
+        clients can parse it directly without stripping a text prefix.
+        """
+        if not result.stdout:
+            return [self._format_command_result(command_name, result)]
 
-    def _get_ruff_explain_rule_schema(self) -> Dict[str, Any]:
-        """Get JSON schema for ruff-explain-rule tool."""
-        return {
-            "type": "object",
-            "properties": {
-                "rule": {
-                    "type": "string",
-                    "description": "Rule code to explain (e.g., 'E501', 'F401')",
-                }
-            },
-            "required": ["rule"],
-        }
+        passed, completed, failed = _RESULT_PREFIXES.get(
+            command_name
+        ) or _result_prefixes(command_name)
+        if result.success:
+            status = passed if result.returncode == 0 else completed
+        else:
+            status = (failed + result.stderr).rstrip()
+        return [
+            types.TextContent(type="text", text=status),
+            types.TextContent(type="text", text=result.stdout),
+        ]
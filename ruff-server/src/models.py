@@ -1,35 +1,55 @@
 """
 Data models for Ruff MCP Server
 ===============================
-Dataclasses defining configuration and result structures for Ruff operations.
+Immutable, slotted dataclasses defining configuration and result structures
+for Ruff operations.
 """
 
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Iterable, Optional, Tuple, Union
 
 
-@dataclass
+def _split_rule_codes(
+    codes: Union[str, Iterable[str], None],
+) -> Optional[Tuple[str, ...]]:
+    """Normalise a comma-separated string (or iterable) of rule codes."""
+    if not codes:
+        return None
+    if isinstance(codes, str):
+        codes = codes.split(",")
+    return tuple(code.strip() for code in codes if code.strip()) or None
+
+
+@dataclass(slots=True, frozen=True)
 class RuffCheckConfig:
     """Configuration for ruff check command."""
 
     path: str = "."
     fix: bool = False
     format: str = "text"
-    select: Optional[str] = None
-    ignore: Optional[str] = None
+    select: Optional[Tuple[str, ...]] = None
+    ignore: Optional[Tuple[str, ...]] = None
     show_fixes: bool = False
+    no_cache: bool = False
 
+    def __post_init__(self):
+        # Accept "E,W" strings; store hashable tuples so equivalent selections
+        # compare (and coalesce) equal
+        object.__setattr__(self, "select", _split_rule_codes(self.select))
+        object.__setattr__(self, "ignore", _split_rule_codes(self.ignore))
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class RuffFormatConfig:
     """Configuration for ruff format command."""
 
     path: str = "."
     check: bool = False
     diff: bool = False
+    no_cache: bool = False
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class RuffCheckDiffConfig:
     """Configuration for ruff check-diff command."""
 
@@ -37,21 +57,21 @@ class RuffCheckDiffConfig:
     format: str = "text"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class RuffShowSettingsConfig:
     """Configuration for ruff show-settings command."""
 
     path: str = "."
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class RuffExplainRuleConfig:
     """Configuration for ruff rule explanation."""
 
     rule: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CommandResult:
     """Result of a command execution."""
 
@@ -59,8 +79,12 @@ class CommandResult:
     stdout: str
     stderr: str
     success: bool
-
-    @property
-    def output(self) -> str:
-        """Get combined output."""
-        return self.stdout + (f"\n{self.stderr}" if self.stderr else "")
+    output: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Combined output, computed once (frozen, so set via object.__setattr__)
+        object.__setattr__(
+            self,
+            "output",
+            f"{self.stdout}\n{self.stderr}" if self.stderr else self.stdout,
+        )
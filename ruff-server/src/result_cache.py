@@ -0,0 +1,63 @@
+"""
+Result caching for Ruff MCP Server
+==================================
+Bounded cache for deterministic tool results, shared by both server entry
+points.
+"""
+
+import os
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+# Result caching for deterministic tools: rule docs never change within a
+# process; settings are keyed on config file mtimes and also expire.
+RESULT_CACHE_SIZE = 512
+SETTINGS_CACHE_TTL = 60.0
+
+
+class ResultCache:
+    """Bounded cache of successful results, evicting the oldest entry."""
+
+    __slots__ = ("_succeeded", "_entries")
+
+    def __init__(self, succeeded: Callable[[Any], bool]):
+        self._succeeded = succeeded
+        self._entries: Dict[tuple, Tuple[float, Any]] = {}
+
+    async def run(
+        self,
+        key: tuple,
+        run: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+    ):
+        """Return a cached successful result for key, or run and cache it."""
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and (ttl is None or now - entry[0] < ttl):
+            return entry[1]
+
+        result = await run()
+        if self._succeeded(result):
+            entries = self._entries
+            if key not in entries and len(entries) >= RESULT_CACHE_SIZE:
+                entries.pop(next(iter(entries)))
+            entries[key] = (now, result)
+        return result
+
+
+def config_mtimes(
+    pyproject_toml: Optional[Path], project_root: Path
+) -> Tuple[Optional[int], ...]:
+    """Modification times of the config files that affect Ruff settings."""
+    mtimes = []
+    for candidate in (
+        pyproject_toml,
+        project_root / "ruff.toml",
+        project_root / ".ruff.toml",
+    ):
+        try:
+            mtimes.append(os.stat(candidate).st_mtime_ns if candidate else None)
+        except OSError:
+            mtimes.append(None)
+    return tuple(mtimes)
@@ -5,46 +5,32 @@ Ruff MCP Server for Python Code Quality
 Model Context Protocol server that provides fast Python linting and formatting using Ruff.
 """
 
+from __future__ import annotations
+
 import asyncio
+import importlib.util
+import os
+import subprocess
 import sys
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 # MCP imports (these would be installed as dependencies)
-try:
+HAS_MCP = importlib.util.find_spec("mcp") is not None
+if HAS_MCP:
     from mcp import types
-    from mcp.server import Server, NotificationOptions
+    from mcp.server import NotificationOptions, Server
     from mcp.server.models import InitializationOptions
-
-    HAS_MCP = True
-except ImportError:
-    HAS_MCP = False
-
+else:
     # Fallback for development without MCP
-    class types:
-        @staticmethod
-        def Tool(**kwargs):
-            return kwargs
-
-        @staticmethod
-        def TextContent(**kwargs):
-            return kwargs
-
-    class Server:
-        def __init__(self, name: str, version: str):
-            pass
-
-        def list_tools(self):
-            return lambda func: func
+    from _mcp_stubs import InitializationOptions, NotificationOptions, Server, types
 
-        def call_tool(self):
-            return lambda func: func
+from config import _find_pyproject_cached
+from result_cache import SETTINGS_CACHE_TTL, ResultCache, config_mtimes
 
-    class NotificationOptions:
-        pass
 
-    class InitializationOptions:
-        pass
+# Prebound constructor for the response objects every handler builds
+_TextContent = types.TextContent
 
 
 class RuffMCPServer:
@@ -54,147 +40,180 @@ class RuffMCPServer:
         self.server = Server("ruff-server", "1.0.0")
         self.project_root = project_root or Path.cwd()
         self.pyproject_toml = self._find_pyproject_toml()
+        # Built once; every ruff invocation extends its command with these
+        self._config_args: Tuple[str, ...] = (
+            ("--config", str(self.pyproject_toml)) if self.pyproject_toml else ()
+        )
+        self._result_cache = ResultCache(lambda result: result.returncode == 0)
+        self._dispatch = {
+            "ruff-check": self._ruff_check,
+            "ruff-format": self._ruff_format,
+            "ruff-check-diff": self._ruff_check_diff,
+            "ruff-show-settings": self._ruff_show_settings,
+            "ruff-explain-rule": self._ruff_explain_rule,
+        }
 
         # Setup MCP handlers
         self._setup_tools()
 
     def _find_pyproject_toml(self) -> Optional[Path]:
         """Find pyproject.toml configuration file."""
-        for path in [self.project_root, *self.project_root.parents]:
-            pyproject_path = path / "pyproject.toml"
-            if pyproject_path.exists():
-                return pyproject_path
-        return None
+        return _find_pyproject_cached(os.path.abspath(self.project_root))
+
+    async def _run_subprocess(self, cmd: List[str]) -> subprocess.CompletedProcess:
+        """Run a command in the project root on a worker thread.
+
+        Keeps process spawning and reaping off the event loop instead of
+        going through asyncio's child watcher.
+        """
+        return await asyncio.to_thread(
+            subprocess.run, cmd, capture_output=True, cwd=self.project_root
+        )
+
+    async def _run_cached(
+        self, key: tuple, cmd: List[str], ttl: Optional[float] = None
+    ) -> subprocess.CompletedProcess:
+        """Run cmd, reusing the last successful result for key."""
+        return await self._result_cache.run(
+            key, lambda: self._run_subprocess(cmd), ttl=ttl
+        )
+
+    def _config_mtimes(self) -> Tuple[Optional[int], ...]:
+        """Modification times of the config files that affect Ruff settings."""
+        return config_mtimes(self.pyproject_toml, self.project_root)
 
     def _setup_tools(self):
         """Set up MCP tools for Ruff operations."""
 
-        @self.server.list_tools()
-        async def handle_list_tools() -> List[types.Tool]:
-            """List available Ruff tools."""
-            return [
-                types.Tool(
-                    name="ruff-check",
-                    description="Run Ruff linter to identify code issues",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "path": {
-                                "type": "string",
-                                "description": "Path to check (file or directory)",
-                                "default": ".",
-                            },
-                            "fix": {
-                                "type": "boolean",
-                                "description": "Automatically fix issues where possible",
-                                "default": False,
-                            },
-                            "format": {
-                                "type": "string",
-                                "enum": [
-                                    "text",
-                                    "json",
-                                    "github",
-                                    "gitlab",
-                                    "junit",
-                                    "sarif",
-                                ],
-                                "description": "Output format",
-                                "default": "text",
-                            },
-                            "select": {
-                                "type": "string",
-                                "description": "Comma-separated list of rule codes to select (e.g., 'E,W,F')",
-                            },
-                            "ignore": {
-                                "type": "string",
-                                "description": "Comma-separated list of rule codes to ignore",
-                            },
-                            "show_fixes": {
-                                "type": "boolean",
-                                "description": "Show available fixes for issues",
-                                "default": False,
-                            },
+        # Tool definitions never change; build them once and share the list
+        self._tools_cache: List[types.Tool] = [
+            types.Tool(
+                name="ruff-check",
+                description="Run Ruff linter to identify code issues",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "path": {
+                            "type": "string",
+                            "description": "Path to check (file or directory)",
+                            "default": ".",
                         },
-                        "required": [],
-                    },
-                ),
-                types.Tool(
-                    name="ruff-format",
-                    description="Format Python code using Ruff (Black-compatible)",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "path": {
-                                "type": "string",
-                                "description": "Path to format (file or directory)",
-                                "default": ".",
-                            },
-                            "check": {
-                                "type": "boolean",
-                                "description": "Only check formatting without making changes",
-                                "default": False,
-                            },
-                            "diff": {
-                                "type": "boolean",
-                                "description": "Show diff of formatting changes",
-                                "default": False,
-                            },
+                        "fix": {
+                            "type": "boolean",
+                            "description": "Automatically fix issues where possible",
+                            "default": False,
                         },
-                        "required": [],
-                    },
-                ),
-                types.Tool(
-                    name="ruff-check-diff",
-                    description="Check Ruff issues on changed files only (git diff)",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "base": {
-                                "type": "string",
-                                "description": "Base commit/branch to compare against",
-                                "default": "HEAD~1",
-                            },
-                            "format": {
-                                "type": "string",
-                                "enum": ["text", "json", "github"],
-                                "description": "Output format",
-                                "default": "text",
-                            },
+                        "format": {
+                            "type": "string",
+                            "enum": [
+                                "text",
+                                "json",
+                                "github",
+                                "gitlab",
+                                "junit",
+                                "sarif",
+                            ],
+                            "description": "Output format",
+                            "default": "text",
+                        },
+                        "select": {
+                            "type": "string",
+                            "description": "Comma-separated list of rule codes to select (e.g., 'E,W,F')",
+                        },
+                        "ignore": {
+                            "type": "string",
+                            "description": "Comma-separated list of rule codes to ignore",
+                        },
+                        "show_fixes": {
+                            "type": "boolean",
+                            "description": "Show available fixes for issues",
+                            "default": False,
                         },
-                        "required": [],
                     },
-                ),
-                types.Tool(
-                    name="ruff-show-settings",
-                    description="Show active Ruff configuration settings",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "path": {
-                                "type": "string",
-                                "description": "Path to show settings for",
-                                "default": ".",
-                            }
+                    "required": [],
+                },
+            ),
+            types.Tool(
+                name="ruff-format",
+                description="Format Python code using Ruff (Black-compatible)",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "path": {
+                            "type": "string",
+                            "description": "Path to format (file or directory)",
+                            "default": ".",
+                        },
+                        "check": {
+                            "type": "boolean",
+                            "description": "Only check formatting without making changes",
+                            "default": False,
+                        },
+                        "diff": {
+                            "type": "boolean",
+                            "description": "Show diff of formatting changes",
+                            "default": False,
                         },
-                        "required": [],
                     },
-                ),
-                types.Tool(
-                    name="ruff-explain-rule",
-                    description="Explain a specific Ruff rule",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "rule": {
-                                "type": "string",
-                                "description": "Rule code to explain (e.g., 'E501', 'F401')",
-                            }
+                    "required": [],
+                },
+            ),
+            types.Tool(
+                name="ruff-check-diff",
+                description="Check Ruff issues on changed files only (git diff)",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "base": {
+                            "type": "string",
+                            "description": "Base commit/branch to compare against",
+                            "default": "HEAD~1",
+                        },
+                        "format": {
+                            "type": "string",
+                            "enum": ["text", "json", "github"],
+                            "description": "Output format",
+                            "default": "text",
                         },
-                        "required": ["rule"],
                     },
-                ),
-            ]
+                    "required": [],
+                },
+            ),
+            types.Tool(
+                name="ruff-show-settings",
+                description="Show active Ruff configuration settings",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "path": {
+                            "type": "string",
+                            "description": "Path to show settings for",
+                            "default": ".",
+                        }
+                    },
+                    "required": [],
+                },
+            ),
+            types.Tool(
+                name="ruff-explain-rule",
+                description="Explain a specific Ruff rule",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "rule": {
+                            "type": "string",
+                            "description": "Rule code to explain (e.g., 'E501', 'F401')",
+                        }
+                    },
+                    "required": ["rule"],
+                },
+            ),
+        ]
+
+        @self.server.list_tools()
+        async def handle_list_tools() -> List[types.Tool]:
+            """List available Ruff tools."""
+            return self._tools_cache
 
         @self.server.call_tool()
         async def handle_call_tool(
@@ -202,23 +221,13 @@ class RuffMCPServer:
         ) -> List[types.TextContent]:
             """Handle tool calls."""
             try:
-                if name == "ruff-check":
-                    return await self._ruff_check(arguments)
-                elif name == "ruff-format":
-                    return await self._ruff_format(arguments)
-                elif name == "ruff-check-diff":
-                    return await self._ruff_check_diff(arguments)
-                elif name == "ruff-show-settings":
-                    return await self._ruff_show_settings(arguments)
-                elif name == "ruff-explain-rule":
-                    return await self._ruff_explain_rule(arguments)
-                else:
-                    return [
-                        types.TextContent(type="text", text=f"Unknown tool: {name}")
-                    ]
+                handler = self._dispatch.get(name)
+                if handler is None:
+                    return [_TextContent(type="text", text=f"Unknown tool: {name}")]
+                return await handler(arguments)
             except Exception as e:
                 return [
-                    types.TextContent(
+                    _TextContent(
                         type="text", text=f"Error executing tool {name}: {str(e)}"
                     )
                 ]
@@ -238,7 +247,7 @@ class RuffMCPServer:
             cmd.append("--fix")
 
         if format_type != "text":
-            cmd.extend(["--format", format_type])
+            cmd.extend(["--output-format", format_type])
 
         if select:
             cmd.extend(["--select", select])
@@ -250,43 +259,35 @@ class RuffMCPServer:
             cmd.append("--show-fixes")
 
         # Add config file if available
-        if self.pyproject_toml:
-            cmd.extend(["--config", str(self.pyproject_toml)])
+        cmd.extend(self._config_args)
 
         try:
-            result = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=self.project_root,
-            )
-            stdout, stderr = await result.communicate()
+            result = await self._run_subprocess(cmd)
+            stdout, stderr = result.stdout, result.stderr
 
             output = stdout.decode() if stdout else ""
             error = stderr.decode() if stderr else ""
 
             if result.returncode == 0:
-                response = "✅ Ruff check passed - no issues found!"
+                parts = ["✅ Ruff check passed - no issues found!"]
                 if output:
-                    response += f"\n\n{output}"
+                    parts += ("\n\n", output)
             else:
-                response = f"❌ Ruff check found issues:\n\n{output}"
+                parts = ["❌ Ruff check found issues:\n\n", output]
                 if error:
-                    response += f"\n\nErrors:\n{error}"
+                    parts += ("\n\nErrors:\n", error)
 
-            return [types.TextContent(type="text", text=response)]
+            return [_TextContent(type="text", text="".join(parts))]
 
         except FileNotFoundError:
             return [
-                types.TextContent(
+                _TextContent(
                     type="text",
                     text="❌ Ruff not found. Install with: pip install ruff",
                 )
             ]
         except Exception as e:
-            return [
-                types.TextContent(type="text", text=f"❌ Ruff check failed: {str(e)}")
-            ]
+            return [_TextContent(type="text", text=f"❌ Ruff check failed: {str(e)}")]
 
     async def _ruff_format(self, args: Dict[str, Any]) -> List[types.TextContent]:
         """Format code using Ruff."""
@@ -303,50 +304,40 @@ class RuffMCPServer:
             cmd.append("--diff")
 
         # Add config file if available
-        if self.pyproject_toml:
-            cmd.extend(["--config", str(self.pyproject_toml)])
+        cmd.extend(self._config_args)
 
         try:
-            result = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=self.project_root,
-            )
-            stdout, stderr = await result.communicate()
+            result = await self._run_subprocess(cmd)
+            stdout, stderr = result.stdout, result.stderr
 
             output = stdout.decode() if stdout else ""
             error = stderr.decode() if stderr else ""
 
             if result.returncode == 0:
                 if check:
-                    response = "✅ Code formatting is correct!"
+                    parts = ["✅ Code formatting is correct!"]
                 elif diff:
-                    response = "📝 Formatting diff:\n\n" + (
-                        output or "No changes needed"
-                    )
+                    parts = ["📝 Formatting diff:\n\n", output or "No changes needed"]
                 else:
-                    response = "✅ Code formatted successfully!"
+                    parts = ["✅ Code formatted successfully!"]
                     if output:
-                        response += f"\n\nFiles formatted:\n{output}"
+                        parts += ("\n\nFiles formatted:\n", output)
             else:
-                response = f"❌ Ruff format failed:\n\n{output}"
+                parts = ["❌ Ruff format failed:\n\n", output]
                 if error:
-                    response += f"\n\nErrors:\n{error}"
+                    parts += ("\n\nErrors:\n", error)
 
-            return [types.TextContent(type="text", text=response)]
+            return [_TextContent(type="text", text="".join(parts))]
 
         except FileNotFoundError:
             return [
-                types.TextContent(
+                _TextContent(
                     type="text",
                     text="❌ Ruff not found. Install with: pip install ruff",
                 )
             ]
         except Exception as e:
-            return [
-                types.TextContent(type="text", text=f"❌ Ruff format failed: {str(e)}")
-            ]
+            return [_TextContent(type="text", text=f"❌ Ruff format failed: {str(e)}")]
 
     async def _ruff_check_diff(self, args: Dict[str, Any]) -> List[types.TextContent]:
         """Check Ruff issues on changed files only."""
@@ -355,75 +346,63 @@ class RuffMCPServer:
 
         try:
             # Get changed files
-            git_result = await asyncio.create_subprocess_exec(
-                "git",
-                "diff",
-                "--name-only",
-                base,
-                "--",
-                "*.py",
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=self.project_root,
+            git_result = await self._run_subprocess(
+                ["git", "diff", "--name-only", base, "--", "*.py"]
             )
-            git_stdout, git_stderr = await git_result.communicate()
+            git_stdout, git_stderr = git_result.stdout, git_result.stderr
 
             if git_result.returncode != 0:
                 return [
-                    types.TextContent(
+                    _TextContent(
                         type="text", text=f"❌ Git diff failed: {git_stderr.decode()}"
                     )
                 ]
 
+            # Split the raw bytes and decode only the non-blank lines
             changed_files = [
-                f.strip() for f in git_stdout.decode().split("\n") if f.strip()
+                line.decode()
+                for line in git_stdout.splitlines()
+                if line and not line.isspace()
             ]
 
             if not changed_files:
-                return [
-                    types.TextContent(type="text", text="ℹ️ No Python files changed")
-                ]
+                return [_TextContent(type="text", text="ℹ️ No Python files changed")]
 
             # Run Ruff on changed files
             cmd = ["ruff", "check"] + changed_files
 
             if format_type != "text":
-                cmd.extend(["--format", format_type])
+                cmd.extend(["--output-format", format_type])
 
-            if self.pyproject_toml:
-                cmd.extend(["--config", str(self.pyproject_toml)])
+            cmd.extend(self._config_args)
 
-            result = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=self.project_root,
-            )
-            stdout, stderr = await result.communicate()
+            result = await self._run_subprocess(cmd)
+            stdout, stderr = result.stdout, result.stderr
 
             output = stdout.decode() if stdout else ""
             error = stderr.decode() if stderr else ""
 
-            response = f"📊 Ruff check on {len(changed_files)} changed file(s):\n"
-            response += f"Files: {', '.join(changed_files[:5])}"
+            parts = [
+                f"📊 Ruff check on {len(changed_files)} changed file(s):\n",
+                "Files: ",
+                ", ".join(changed_files[:5]),
+            ]
             if len(changed_files) > 5:
-                response += f" (and {len(changed_files) - 5} more)"
-            response += "\n\n"
+                parts.append(f" (and {len(changed_files) - 5} more)")
+            parts.append("\n\n")
 
             if result.returncode == 0:
-                response += "✅ No issues found in changed files!"
+                parts.append("✅ No issues found in changed files!")
             else:
-                response += f"❌ Issues found:\n\n{output}"
+                parts += ("❌ Issues found:\n\n", output)
                 if error:
-                    response += f"\n\nErrors:\n{error}"
+                    parts += ("\n\nErrors:\n", error)
 
-            return [types.TextContent(type="text", text=response)]
+            return [_TextContent(type="text", text="".join(parts))]
 
         except Exception as e:
             return [
-                types.TextContent(
-                    type="text", text=f"❌ Ruff diff check failed: {str(e)}"
-                )
+                _TextContent(type="text", text=f"❌ Ruff diff check failed: {str(e)}")
             ]
 
     async def _ruff_show_settings(
@@ -435,38 +414,35 @@ class RuffMCPServer:
         cmd = ["ruff", "check", "--show-settings", path]
 
         try:
-            result = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=self.project_root,
+            result = await self._run_cached(
+                ("ruff-show-settings", path, self._config_mtimes()),
+                cmd,
+                ttl=SETTINGS_CACHE_TTL,
             )
-            stdout, stderr = await result.communicate()
+            stdout, stderr = result.stdout, result.stderr
 
             output = stdout.decode() if stdout else ""
             error = stderr.decode() if stderr else ""
 
             if result.returncode == 0:
-                response = "⚙️ Active Ruff Configuration:\n\n" + output
+                parts = ["⚙️ Active Ruff Configuration:\n\n", output]
             else:
-                response = f"❌ Failed to show settings:\n\n{output}"
+                parts = ["❌ Failed to show settings:\n\n", output]
                 if error:
-                    response += f"\n\nErrors:\n{error}"
+                    parts += ("\n\nErrors:\n", error)
 
-            return [types.TextContent(type="text", text=response)]
+            return [_TextContent(type="text", text="".join(parts))]
 
         except FileNotFoundError:
             return [
-                types.TextContent(
+                _TextContent(
                     type="text",
                     text="❌ Ruff not found. Install with: pip install ruff",
                 )
             ]
         except Exception as e:
             return [
-                types.TextContent(
-                    type="text", text=f"❌ Failed to show settings: {str(e)}"
-                )
+                _TextContent(type="text", text=f"❌ Failed to show settings: {str(e)}")
             ]
 
     async def _ruff_explain_rule(self, args: Dict[str, Any]) -> List[types.TextContent]:
@@ -475,7 +451,7 @@ class RuffMCPServer:
 
         if not rule:
             return [
-                types.TextContent(
+                _TextContent(
                     type="text", text="❌ Rule code is required (e.g., 'E501', 'F401')"
                 )
             ]
@@ -483,38 +459,31 @@ class RuffMCPServer:
         cmd = ["ruff", "rule", rule]
 
         try:
-            result = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=self.project_root,
-            )
-            stdout, stderr = await result.communicate()
+            result = await self._run_cached(("ruff-explain-rule", rule), cmd)
+            stdout, stderr = result.stdout, result.stderr
 
             output = stdout.decode() if stdout else ""
             error = stderr.decode() if stderr else ""
 
             if result.returncode == 0:
-                response = f"📖 Rule {rule} explanation:\n\n{output}"
+                parts = [f"📖 Rule {rule} explanation:\n\n", output]
             else:
-                response = f"❌ Rule {rule} not found or error:\n\n{output}"
+                parts = [f"❌ Rule {rule} not found or error:\n\n", output]
                 if error:
-                    response += f"\n\nErrors:\n{error}"
+                    parts += ("\n\nErrors:\n", error)
 
-            return [types.TextContent(type="text", text=response)]
+            return [_TextContent(type="text", text="".join(parts))]
 
         except FileNotFoundError:
             return [
-                types.TextContent(
+                _TextContent(
                     type="text",
                     text="❌ Ruff not found. Install with: pip install ruff",
                 )
             ]
         except Exception as e:
             return [
-                types.TextContent(
-                    type="text", text=f"❌ Failed to explain rule: {str(e)}"
-                )
+                _TextContent(type="text", text=f"❌ Failed to explain rule: {str(e)}")
             ]
 
 
@@ -5,8 +5,11 @@ Handles all Ruff command execution and subprocess management.
 """
 
 import asyncio
+import os
+import subprocess
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import List, Optional, Tuple
 
 from config import ConfigurationManager
 from models import (
@@ -19,12 +22,51 @@ from models import (
 )
 
 
+def _default_concurrency() -> int:
+    """Max concurrent ruff/git processes (RUFF_MCP_CONCURRENCY overrides)."""
+    try:
+        return max(1, int(os.environ["RUFF_MCP_CONCURRENCY"]))
+    except (KeyError, ValueError):
+        return max(2, (os.cpu_count() or 2) // 2)
+
+
+def _kill_spawned(popen: Future) -> None:
+    """Kill and reap a process whose spawning caller was cancelled."""
+    if popen.cancelled() or popen.exception() is not None:
+        return
+    process = popen.result()
+    process.kill()
+    process.wait()
+
+
 class RuffRunner:
     """Handles Ruff command execution and subprocess management."""
 
-    def __init__(self, config_manager: ConfigurationManager, project_root: Path):
+    def __init__(
+        self,
+        config_manager: ConfigurationManager,
+        project_root: Path,
+        spawn_pool: Optional[Executor] = None,
+        cache_dir: Optional[Path] = None,
+        max_concurrency: Optional[int] = None,
+    ):
         self.config_manager = config_manager
         self.project_root = project_root
+        # Only override Ruff's cache location when asked to; otherwise the
+        # project's cache-dir setting / RUFF_CACHE_DIR apply as usual
+        self._cache_args: Tuple[str, ...] = (
+            ("--cache-dir", os.fspath(cache_dir)) if cache_dir else ()
+        )
+        # Cap concurrent child processes so request bursts queue instead of
+        # oversubscribing the CPU
+        concurrency = max_concurrency or _default_concurrency()
+        self._spawn_limit = asyncio.Semaphore(concurrency)
+        # Subprocesses are spawned and awaited on worker threads so that
+        # fork/exec never stalls the event loop; each running child holds
+        # one thread, so the pool matches the concurrency cap
+        self._spawn_pool = spawn_pool or ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="ruff-spawn"
+        )
 
     async def run_check(self, config: RuffCheckConfig) -> CommandResult:
         """Run ruff check command."""
@@ -34,17 +76,18 @@ class RuffRunner:
             cmd.append("--fix")
 
         if config.format != "text":
-            cmd.extend(["--format", config.format])
+            cmd.extend(["--output-format", config.format])
 
         if config.select:
-            cmd.extend(["--select", config.select])
+            cmd.extend(["--select", ",".join(config.select)])
 
         if config.ignore:
-            cmd.extend(["--ignore", config.ignore])
+            cmd.extend(["--ignore", ",".join(config.ignore)])
 
         if config.show_fixes:
             cmd.append("--show-fixes")
 
+        cmd.extend(self._get_cache_args(config.no_cache))
         cmd.extend(self.config_manager.get_config_args())
 
         return await self._run_command(cmd)
@@ -59,15 +102,22 @@ class RuffRunner:
         if config.diff:
             cmd.append("--diff")
 
+        cmd.extend(self._get_cache_args(config.no_cache))
         cmd.extend(self.config_manager.get_config_args())
 
         return await self._run_command(cmd)
 
-    async def run_check_diff(self, config: RuffCheckDiffConfig) -> CommandResult:
-        """Run ruff check on changed files only."""
+    async def run_check_diff(
+        self, config: RuffCheckDiffConfig, changed_files: Optional[List[str]] = None
+    ) -> CommandResult:
+        """Run ruff check on changed files only.
+
+        Callers that already ran ``get_changed_files`` can pass the list in
+        to avoid a second git invocation.
+        """
         try:
-            # Get changed Python files
-            changed_files = await self._get_changed_files(config.base)
+            if changed_files is None:
+                changed_files = await self.get_changed_files(config.base)
 
             if not changed_files:
                 return CommandResult(
@@ -81,22 +131,26 @@ class RuffRunner:
             cmd = ["ruff", "check"] + changed_files
 
             if config.format != "text":
-                cmd.extend(["--format", config.format])
+                cmd.extend(["--output-format", config.format])
 
+            cmd.extend(self._cache_args)
             cmd.extend(self.config_manager.get_config_args())
 
             result = await self._run_command(cmd)
 
             # Prepend file list to output
-            file_list = f"📊 Checking {len(changed_files)} changed file(s):\n"
-            file_list += f"Files: {', '.join(changed_files[:5])}"
+            parts = [
+                f"📊 Checking {len(changed_files)} changed file(s):\n",
+                "Files: ",
+                ", ".join(changed_files[:5]),
+            ]
             if len(changed_files) > 5:
-                file_list += f" (and {len(changed_files) - 5} more)"
-            file_list += "\n\n"
+                parts.append(f" (and {len(changed_files) - 5} more)")
+            parts += ("\n\n", result.stdout)
 
             return CommandResult(
                 returncode=result.returncode,
-                stdout=file_list + result.stdout,
+                stdout="".join(parts),
                 stderr=result.stderr,
                 success=result.success,
             )
@@ -117,39 +171,34 @@ class RuffRunner:
 
         return await self._run_command(cmd)
 
-    async def _get_changed_files(self, base: str) -> List[str]:
+    def _get_cache_args(self, no_cache: bool) -> Tuple[str, ...]:
+        """Get cache arguments for ruff commands."""
+        return ("--no-cache",) if no_cache else self._cache_args
+
+    async def get_changed_files(self, base: str) -> List[str]:
         """Get list of changed Python files from git."""
         cmd = ["git", "diff", "--name-only", base, "--", "*.py"]
 
-        result = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            cwd=self.project_root,
-        )
-        stdout, stderr = await result.communicate()
+        returncode, stdout, stderr = await self._spawn(cmd)
 
-        if result.returncode != 0:
+        if returncode != 0:
             raise Exception(f"Git diff failed: {stderr.decode()}")
 
-        return [f.strip() for f in stdout.decode().split("\n") if f.strip()]
+        # Split the raw bytes and decode only the non-blank lines
+        return [
+            line.decode() for line in stdout.splitlines() if line and not line.isspace()
+        ]
 
     async def _run_command(self, cmd: List[str]) -> CommandResult:
         """Execute a command and return the result."""
         try:
-            result = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=self.project_root,
-            )
-            stdout, stderr = await result.communicate()
+            returncode, stdout, stderr = await self._spawn(cmd)
 
             return CommandResult(
-                returncode=result.returncode or 0,
+                returncode=returncode or 0,
                 stdout=stdout.decode() if stdout else "",
                 stderr=stderr.decode() if stderr else "",
-                success=result.returncode == 0,
+                success=returncode == 0,
             )
 
         except FileNotFoundError:
@@ -161,3 +210,35 @@ class RuffRunner:
             )
         except Exception as e:
             return CommandResult(returncode=1, stdout="", stderr=str(e), success=False)
+
+    async def _spawn(self, cmd: List[str]) -> Tuple[int, bytes, bytes]:
+        """Run a command on the spawn pool and return (returncode, stdout, stderr).
+
+        At most ``max_concurrency`` commands run at once; further calls wait.
+        If the awaiting task is cancelled (e.g. a tool timeout), the child
+        process is killed rather than left running.
+        """
+        loop = asyncio.get_running_loop()
+        async with self._spawn_limit:
+            popen = self._spawn_pool.submit(
+                subprocess.Popen,
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                cwd=self.project_root,
+            )
+            try:
+                process = await asyncio.wrap_future(popen)
+            except asyncio.CancelledError:
+                # Popen may already be running on its thread; kill the child
+                # as soon as it exists
+                popen.add_done_callback(_kill_spawned)
+                raise
+            try:
+                stdout, stderr = await loop.run_in_executor(
+                    self._spawn_pool, process.communicate
+                )
+            except asyncio.CancelledError:
+                process.kill()
+                raise
+        return process.returncode, stdout, stderr
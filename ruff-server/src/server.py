@@ -4,34 +4,24 @@ Main MCP server orchestration for Ruff
 Coordinates all components and provides the main server interface.
 """
 
+from __future__ import annotations
+
+import importlib.util
 from pathlib import Path
 from typing import Optional
 
+from config import ConfigurationManager
+from mcp_handler import MCPHandler
+from ruff_runner import RuffRunner
+
 # MCP imports (these would be installed as dependencies)
-try:
-    from mcp.server import Server, NotificationOptions
+HAS_MCP = importlib.util.find_spec("mcp") is not None
+if HAS_MCP:
+    from mcp.server import NotificationOptions, Server
     from mcp.server.models import InitializationOptions
-
-    HAS_MCP = True
-except ImportError:
-    HAS_MCP = False
-
+else:
     # Fallback for development without MCP
-    class Server:
-        def __init__(self, name: str, version: str):
-            pass
-
-        def list_tools(self):
-            return lambda func: func
-
-        def call_tool(self):
-            return lambda func: func
-
-    class NotificationOptions:
-        pass
-
-    class InitializationOptions:
-        pass
+    from _mcp_stubs import InitializationOptions, NotificationOptions, Server
 
 
 class RuffMCPServer:
@@ -41,10 +31,6 @@ class RuffMCPServer:
         self.project_root = project_root or Path.cwd()
 
         # Initialize components with dependency injection
-        from config import ConfigurationManager
-        from ruff_runner import RuffRunner
-        from mcp_handler import MCPHandler
-
         self.config_manager = ConfigurationManager(self.project_root)
         self.ruff_runner = RuffRunner(self.config_manager, self.project_root)
         self.mcp_handler = MCPHandler(self.ruff_runner)